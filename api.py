@@ -4,6 +4,7 @@ import json
 import os
 from typing import Tuple, List, Optional
 from functools import lru_cache
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -12,7 +13,22 @@ import uvicorn
 from fastapi.responses import FileResponse, RedirectResponse
 import requests
 
-app = FastAPI(title="WikiSpeedia API")
+DB_PATH = os.getenv("WIKISPEEDIA_DB_PATH", "/Users/jts/daily/wikihop/db/data/wikihop.db")
+MANIFEST_PATH = os.getenv("WIKISPEEDIA_MANIFEST_PATH")
+
+# opened lazily in the lifespan so importing the app (and spawning workers) stays cheap
+db = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global db
+    db = SQLiteDB(DB_PATH, manifest_path=MANIFEST_PATH)
+    yield
+    db.close()
+
+
+app = FastAPI(title="WikiSpeedia API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -38,19 +54,52 @@ class HealthResponse(BaseModel):
 
 
 class SQLiteDB:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, manifest_path: Optional[str] = None):
         """Initialize the database with path to SQLite database"""
         self.db_path = db_path
+        self.manifest_path = manifest_path or db_path + ".manifest.json"
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row
         self.cursor = self.conn.cursor()
-        self._article_count = self._get_article_count()
-        print(f"Connected to SQLite database with {self._article_count} articles")
+        self._article_count = None
+        print(f"Connected to SQLite database at {db_path}")
+
+    @property
+    def article_count(self) -> int:
+        if self._article_count is None:
+            self._article_count = self._read_manifest_count()
+        if self._article_count is None:
+            self._article_count = self._get_article_count()
+        return self._article_count
+
+    def _read_manifest_count(self) -> Optional[int]:
+        """Read the precomputed article count, ignoring manifests built for a different db"""
+        if not os.path.exists(self.manifest_path):
+            return None
+
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+
+            if (
+                manifest["db_size"] != os.path.getsize(self.db_path)
+                or manifest["db_mtime"] != os.path.getmtime(self.db_path)
+            ):
+                print(f"Ignoring stale manifest at {self.manifest_path}")
+                return None
+
+            return int(manifest["article_count"])
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            print(f"Ignoring malformed manifest at {self.manifest_path}: {e}")
+            return None
 
     def _get_article_count(self):
         self.cursor.execute("SELECT COUNT(*) FROM core_articles")
         return self.cursor.fetchone()[0]
 
+    def close(self):
+        self.conn.close()
+
     @lru_cache(maxsize=8192)
     def get_article_with_links(self, article_title: str) -> Tuple[str, List[str]]:
         self.cursor.execute(
@@ -69,16 +118,10 @@ class SQLiteDB:
         return [row[0] for row in self.cursor.fetchall()]
 
 
-# Initialize database connection
-db = SQLiteDB(
-    os.getenv("WIKISPEEDIA_DB_PATH", "/Users/jts/daily/wikihop/db/data/wikihop.db")
-)
-
-
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint that returns the article count"""
-    return HealthResponse(status="healthy", article_count=db._article_count)
+    return HealthResponse(status="healthy", article_count=db.article_count)
 
 
 @app.get("/get_all_articles", response_model=List[str])
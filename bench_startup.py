@@ -0,0 +1,133 @@
+import argparse
+import importlib.util
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+from build_manifest import build_manifest
+
+# runs in a fresh interpreter so module import costs are measured cold
+# "eager" reproduces the old api.py, which counted the articles while the module was imported
+STARTUP_SCRIPT = """
+import asyncio, json, os, sys, time
+eager = sys.argv[1] == "eager"
+t0 = time.perf_counter()
+import api
+if eager:
+    eager_count = api.SQLiteDB(os.environ["WIKISPEEDIA_DB_PATH"])._get_article_count()
+t1 = time.perf_counter()
+
+async def main():
+    async with api.lifespan(api.app):
+        if eager:
+            # the old api served the count it computed at import
+            api.db._article_count = eager_count
+        t2 = time.perf_counter()
+        health = await api.health_check()
+        t3 = time.perf_counter()
+    return t2, t3, health.article_count
+
+t2, t3, article_count = asyncio.run(main())
+print(json.dumps({
+    "import_s": t1 - t0,
+    "lifespan_s": t2 - t1,
+    "first_health_s": t3 - t2,
+    "total_s": t3 - t0,
+    "article_count": article_count,
+}))
+"""
+
+
+def make_db(db_path: str, num_articles: int):
+    """Create a synthetic wikihop db with the same schema the api reads"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE core_articles (title TEXT PRIMARY KEY, links_json TEXT)")
+    conn.executemany(
+        "INSERT INTO core_articles VALUES (?, ?)",
+        (
+            (f"Article {i}", json.dumps([f"Article {(i * 7 + j) % num_articles}" for j in range(20)]))
+            for i in range(num_articles)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure(workdir: str, db_path: str, repeats: int, mode: str) -> dict:
+    env = dict(os.environ, WIKISPEEDIA_DB_PATH=db_path)
+    env["PYTHONPATH"] = os.path.dirname(os.path.abspath(__file__))
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT, mode],
+            cwd=workdir,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    # report the median of each timing
+    return {
+        key: sorted(run[key] for run in runs)[len(runs) // 2]
+        for key in runs[0]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark api startup: the old import-time count, the lazy count, and the lazy count read from a manifest"
+    )
+    parser.add_argument(
+        "--db-path",
+        type=str,
+        default=None,
+        help="Existing wikihop db (default: build a small synthetic one, which won't reflect the production db)",
+    )
+    parser.add_argument("--num-articles", type=int, default=350_000, help="Size of the synthetic db")
+    parser.add_argument("--repeats", type=int, default=5, help="Number of cold starts per configuration")
+
+    args = parser.parse_args()
+
+    if importlib.util.find_spec("fastapi") is None:
+        raise ImportError("The api dependencies are not installed, run `pip install -r requirements.txt` first")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # the api serves ./dist as static files
+        os.makedirs(os.path.join(workdir, "dist"))
+
+        db_path = args.db_path
+        if db_path is None:
+            db_path = os.path.join(workdir, "wikihop.db")
+            print(f"Building synthetic db with {args.num_articles} articles")
+            make_db(db_path, args.num_articles)
+
+        manifest_path = db_path + ".manifest.json"
+        if os.path.exists(manifest_path):
+            raise FileExistsError(f"Move {manifest_path} aside to benchmark the cold path")
+
+        results = {
+            "eager count": measure(workdir, db_path, args.repeats, "eager"),
+            "lazy count": measure(workdir, db_path, args.repeats, "lazy"),
+        }
+        build_manifest(db_path, manifest_path)
+        try:
+            results["manifest"] = measure(workdir, db_path, args.repeats, "lazy")
+        finally:
+            if args.db_path is not None:
+                os.remove(manifest_path)
+
+    if args.db_path is None:
+        print("Note: synthetic db, pass --db-path to measure the production wikihop db")
+
+    for name, result in results.items():
+        print(
+            f"{name:>12}: import {result['import_s'] * 1000:.1f}ms, "
+            f"lifespan {result['lifespan_s'] * 1000:.1f}ms, "
+            f"first /health {result['first_health_s'] * 1000:.1f}ms, "
+            f"total {result['total_s'] * 1000:.1f}ms"
+        )
@@ -0,0 +1,40 @@
+import argparse
+import json
+import os
+import sqlite3
+
+
+def build_manifest(db_path: str, manifest_path: str = None) -> dict:
+    """Precompute db metadata so the api doesn't have to scan the db on startup"""
+    manifest_path = manifest_path or db_path + ".manifest.json"
+
+    conn = sqlite3.connect(db_path)
+    article_count = conn.execute("SELECT COUNT(*) FROM core_articles").fetchone()[0]
+    conn.close()
+
+    manifest = {
+        "db_path": os.path.basename(db_path),
+        # used to detect a manifest that was built for a different db
+        "db_size": os.path.getsize(db_path),
+        "db_mtime": os.path.getmtime(db_path),
+        "article_count": article_count,
+    }
+
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=4)
+
+    print(f"Wrote manifest for {article_count} articles to {manifest_path}")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the metadata manifest for a wikihop database")
+    parser.add_argument("--db-path", type=str, default="wikihop.db", help="Path to the wikihop database")
+    parser.add_argument("--manifest-path", type=str, default=None, help="Output path (default: <db-path>.manifest.json)")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        raise FileNotFoundError(f"Database file not found at {args.db_path}")
+
+    build_manifest(args.db_path, args.manifest_path)
@@ -1,8 +1,9 @@
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Callable
 import sqlite3
 import json
 import litellm
 import re
+import inspect
 import asyncio
 import argparse
 from functools import lru_cache
@@ -13,12 +14,7 @@ class SQLiteDB:
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row
         self.cursor = self.conn.cursor()
-        self._article_count = self._get_article_count()
-        print(f"Connected to SQLite database with {self._article_count} articles")
-
-    def _get_article_count(self):
-        self.cursor.execute("SELECT COUNT(*) FROM core_articles")
-        return self.cursor.fetchone()[0]
+        print(f"Connected to SQLite database at {db_path}")
 
     @lru_cache(maxsize=8192)
     def get_article_with_links(self, article_title: str) -> Tuple[str, List[str]]:
@@ -58,7 +54,8 @@ class AgentPlayer(Player):
         max_links=None,
         max_tries=10,
         target_article = None,
-        seed = None
+        seed = None,
+        stream: bool = False,
     ):
         super().__init__(model)
         self.model = model
@@ -68,6 +65,12 @@ class AgentPlayer(Player):
         self.max_tries = max_tries
         self.target_article = target_article
         self.seed = seed
+        self.stream = stream
+        supported_params = (litellm.get_supported_openai_params(model=self.model) or []) if stream else []
+        # let the backend stop on its own when it supports stop sequences
+        self.supports_stop = "stop" in supported_params
+        # without stream_options the server never reports usage and we fall back to a local estimate
+        self.supports_stream_options = "stream_options" in supported_params
 
     async def get_move(self, game_state: List[Dict]) -> Tuple[str, Dict]:
         prompt = self.construct_prompt(game_state)
@@ -76,31 +79,115 @@ class AgentPlayer(Player):
             {"role": "user", "content": prompt}
         ]
 
+        maximum_answer = len(game_state[-1]["links"])
+        # server reported tokens, plus a local estimate for streams we cancelled before the server reported usage
+        # the two are counted differently so they should never be compared with each other
+        token_stats = {"completion_tokens": 0, "estimated_completion_tokens": 0, "stream_endings": []}
+
         for try_number in range(self.max_tries):
-            response = await litellm.acompletion(
-                model=self.model,
-                api_base=self.api_base,
-                messages=conversation,
-                seed=self.seed
-            )
-            response = response.choices[0].message.content
+            if self.stream:
+                response, ending, usage = await self._stream_completion(conversation)
+                token_stats["stream_endings"].append(ending)
+                if usage is not None:
+                    token_stats["completion_tokens"] += usage.completion_tokens
+                else:
+                    token_stats["estimated_completion_tokens"] += litellm.token_counter(model=self.model, text=response)
+            else:
+                response = await litellm.acompletion(
+                    model=self.model,
+                    api_base=self.api_base,
+                    messages=conversation,
+                    seed=self.seed
+                )
+                token_stats["completion_tokens"] += response.usage.completion_tokens if response.usage else 0
+                response = response.choices[0].message.content
 
             conversation.append({"role": "assistant", "content": response})
 
-            answer, message = self._attempt_to_extract_answer(response, maximum_answer=len(game_state[-1]["links"]))
+            answer, message = self._attempt_to_extract_answer(response, maximum_answer=maximum_answer)
 
             # there was a problem with the answer so give the model another chance
             if answer == -1:
                 conversation.append({"role": "user", "content": message})
                 continue
 
-            assert answer >= 1 and answer <= len(game_state[-1]["links"]), f"Answer {answer} is out of range"
+            assert answer >= 1 and answer <= maximum_answer, f"Answer {answer} is out of range"
 
             # we found an answer so we can return it
-            return game_state[-1]["links"][answer-1], {"tries": try_number, "conversation": conversation}
+            return game_state[-1]["links"][answer-1], {"tries": try_number, "conversation": conversation, **token_stats}
 
         # we tried the max number of times and still didn't find an answer
-        return -1, {"tries": self.max_tries, "conversation": conversation}
+        return -1, {"tries": self.max_tries, "conversation": conversation, **token_stats}
+
+    async def _stream_completion(self, conversation: List[Dict]) -> Tuple[str, str, Optional[object]]:
+        '''streams a completion and cancels it as soon as an <answer> tag closes
+
+        returns the text, how the stream ended ("cancelled", "stop_sequence" or "finished")
+        and the server reported usage, which is None when we cancelled before it arrived'''
+
+        kwargs = {}
+        if self.supports_stop:
+            kwargs["stop"] = ["</answer>"]
+        if self.supports_stream_options:
+            kwargs["stream_options"] = {"include_usage": True}
+
+        response = await litellm.acompletion(
+            model=self.model,
+            api_base=self.api_base,
+            messages=conversation,
+            seed=self.seed,
+            stream=True,
+            **kwargs,
+        )
+
+        text = ""
+        ending = "finished"
+        finish_reason = None
+        usage = None
+        try:
+            async for chunk in response:
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                finish_reason = getattr(chunk.choices[0], "finish_reason", None) or finish_reason
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                text += delta
+
+                # only the tail can contain a newly closed tag
+                # valid or not, the model is done choosing so anything after is wasted
+                if re.search(r"<answer>(\d+)</answer>", text[-(len(delta) + 64):]):
+                    ending = "cancelled"
+                    break
+        finally:
+            # cancel the request so the backend stops generating
+            await self._close_stream(response)
+
+        # the stop sequence is not included in the output, so close the tag ourselves
+        # a completion cut off by length could end in a truncated number, so leave it for a re-prompt
+        if ending == "finished" and self.supports_stop and finish_reason == "stop" and re.search(r"<answer>\d+\s*$", text):
+            text = text.rstrip() + "</answer>"
+            ending = "stop_sequence"
+
+        return text, ending, usage
+
+    async def _close_stream(self, response):
+        '''closes the http response behind a litellm stream so the backend stops generating'''
+
+        # newer litellm wrappers forward aclose to the provider stream, older ones need us to reach in
+        inner = getattr(response, "completion_stream", None)
+        for target, name in ((response, "aclose"), (inner, "aclose"), (inner, "close")):
+            close = getattr(target, name, None)
+            if close is None:
+                continue
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+            return
+
+        print(f"Could not close stream of type {type(response).__name__}, the backend may keep generating")
 
     def construct_prompt(self, game_state: List[Dict]) -> str:
         current = game_state[-1]["article"]
@@ -172,13 +259,17 @@ class Game:
         max_allowed_steps: int,
         player: Player,
         verbose: bool = True,
+        steps: Optional[List[Dict]] = None,
+        on_step: Optional[Callable[[Dict], None]] = None,
     ):
         self.start_article = start_article
         self.target_article = target_article
         self.db = db
         self.max_allowed_steps = max_allowed_steps
-        self.steps = []
-        self.steps_taken = 0
+        # resume from previously completed steps if we were given any
+        self.steps = list(steps) if steps else []
+        self.steps_taken = max(len(self.steps) - 1, 0)
+        self.on_step = on_step
         self.player = player
         self.verbose = verbose
         # Ensure the player knows the target article
@@ -190,17 +281,22 @@ class Game:
         if self.verbose:
             print(f"Starting game from {self.start_article} to {self.target_article}")
 
-        # get the start article
-        _, links = self.db.get_article_with_links(self.start_article)
+        if self.steps:
+            # the game already finished before we were asked to resume it
+            if self.steps[-1]["type"] in ("win", "lose"):
+                return self.steps
+        else:
+            # get the start article
+            _, links = self.db.get_article_with_links(self.start_article)
 
-        self.steps.append(
-            {
-                "type": "start",
-                "article": self.start_article,
-                "links": links,
-                "metadata": {"message": "Game started"},
-            }
-        )
+            self._add_step(
+                {
+                    "type": "start",
+                    "article": self.start_article,
+                    "links": links,
+                    "metadata": {"message": "Game started"},
+                }
+            )
 
         # while the current article is not the target article and the number of steps taken is less than the max allowed steps
         while self.steps_taken < self.max_allowed_steps:
@@ -211,7 +307,7 @@ class Game:
 
             # player couldn't select a valid link
             if player_move == -1:
-                self.steps.append(
+                self._add_step(
                     {"type": "lose", "article": player_move, "metadata": metadata}
                 )
                 break
@@ -222,7 +318,7 @@ class Game:
 
             # if we found it its over
             if player_move == self.target_article:
-                self.steps.append(
+                self._add_step(
                     {"type": "win", "article": player_move, "metadata": metadata}
                 )
                 break
@@ -231,12 +327,12 @@ class Game:
             _, links = self.db.get_article_with_links(player_move)
 
             if len(links) == 0:
-                self.steps.append(
+                self._add_step(
                     {"type": "lose", "article": player_move, "metadata": metadata}
                 )
                 break
 
-            self.steps.append(
+            self._add_step(
                 {
                     "type": "move",
                     "article": player_move,
@@ -247,6 +343,11 @@ class Game:
 
         return self.steps
 
+    def _add_step(self, step: Dict):
+        self.steps.append(step)
+        if self.on_step is not None:
+            self.on_step(step)
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Play the WikiRun game")
@@ -269,6 +370,7 @@ if __name__ == "__main__":
     parser.add_argument("--max-links", type=int, default=200, help="Maximum number of links to consider (default: 200)")
     parser.add_argument("--max-tries", type=int, default=3, help="Maximum number of tries for the agent (default: 3)")
     parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducibility")
+    parser.add_argument("--stream", action="store_true", help="Stream completions and stop as soon as an answer is given")
     
     args = parser.parse_args()
 
@@ -286,7 +388,8 @@ if __name__ == "__main__":
             max_links=args.max_links,
             max_tries=args.max_tries,
             target_article=args.end,
-            seed=args.seed
+            seed=args.seed,
+            stream=args.stream,
         )
 
     # Create and run the game
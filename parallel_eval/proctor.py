@@ -136,11 +136,49 @@ class Run:
         self.seed = seed
 
         self.output_file = f"{self.output_dir}/run_{self.id}.json"
+        # completed steps are appended here one json line at a time so in-flight games can be resumed
+        self.checkpoint_file = f"{self.output_dir}/run_{self.id}.steps.jsonl"
+
+    def load_checkpoint(self) -> list[dict]:
+        if not os.path.exists(self.checkpoint_file):
+            return []
+
+        steps = []
+        truncated = False
+        with open(self.checkpoint_file, "r") as f:
+            for line in f:
+                try:
+                    steps.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # the process died mid-write, everything before this line is intact
+                    truncated = True
+                    break
+                if not line.endswith("\n"):
+                    # the step made it but the newline didn't, so the next append would land on this line
+                    truncated = True
+
+        if truncated:
+            # drop the partial line so new steps aren't appended onto it, replacing atomically so
+            # dying during the rewrite can't lose the steps we already have
+            tmp_file = self.checkpoint_file + ".tmp"
+            with open(tmp_file, "w") as f:
+                f.writelines(json.dumps(step) + "\n" for step in steps)
+            os.replace(tmp_file, self.checkpoint_file)
+
+        return steps
+
+    def save_step(self, step: dict):
+        with open(self.checkpoint_file, "a") as f:
+            f.write(json.dumps(step) + "\n")
 
     async def run(self):
         if os.path.exists(self.output_file):
             return
 
+        steps = self.load_checkpoint()
+        if steps:
+            print(f"Resuming run {self.id} from step {len(steps) - 1}")
+
         player = AgentPlayer(
             model=self.agent_settings["model"],
             api_base=self.agent_settings["api_base"],
@@ -148,6 +186,7 @@ class Run:
             max_tries=self.agent_settings["max_tries"],
             verbose=False,
             seed=self.seed,
+            stream=self.agent_settings.get("stream", False),
         )
 
         game = Game(
@@ -157,6 +196,8 @@ class Run:
             self.max_steps,
             player,
             verbose=False,
+            steps=steps,
+            on_step=self.save_step,
         )
 
         steps = await game.run()
@@ -166,6 +207,7 @@ class Run:
             "api_base": self.agent_settings["api_base"],
             "max_links": self.agent_settings["max_links"],
             "max_tries": self.agent_settings["max_tries"],
+            "stream": self.agent_settings.get("stream", False),
             "start_article": self.start_article,
             "destination_article": self.destination_article,
             "steps": steps,
@@ -176,6 +218,8 @@ class Run:
         with open(self.output_file, "w") as f:
             json.dump(output, f, indent=4)
 
+        os.remove(self.checkpoint_file)
+
         print(f"Run {self.id} completed in {len(steps)} steps")
 
 
@@ -193,6 +237,7 @@ if __name__ == "__main__":
     parser.add_argument("--proctor-id", type=str, default="proctor_1", help="Unique identifier for this proctor run")
     parser.add_argument("--seed", type=int, default=42, help="Starting random seed")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose output")
+    parser.add_argument("--stream", action="store_true", help="Stream completions and stop as soon as an answer is given")
     parser.add_argument("--article-list", type=str, default="supernodes.json", 
                         help="Path to JSON file with list of articles to test")
 
@@ -215,6 +260,7 @@ if __name__ == "__main__":
         "api_base": args.api_base,
         "max_links": args.max_links,
         "max_tries": args.max_tries,
+        "stream": args.stream,
     }
 
     proctor = Proctor(
@@ -0,0 +1,136 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("litellm")
+
+import game
+
+
+class MockAsyncStream:
+    """Stands in for the openai AsyncStream, which closes its http response with an async close()"""
+
+    def __init__(self, parts, usage=None, finish_reason="stop"):
+        self.parts = parts
+        self.usage = usage
+        self.finish_reason = finish_reason
+        self.consumed = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.consumed < len(self.parts):
+            part = self.parts[self.consumed]
+            self.consumed += 1
+            finish_reason = self.finish_reason if self.consumed == len(self.parts) else None
+            return SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=part), finish_reason=finish_reason)]
+            )
+        if self.usage is not None:
+            usage, self.usage = self.usage, None
+            return SimpleNamespace(choices=[], usage=usage)
+        raise StopAsyncIteration
+
+    async def close(self):
+        self.closed = True
+
+
+class MockStreamWrapper:
+    """Mimics an older litellm wrapper that has no aclose of its own"""
+
+    def __init__(self, completion_stream):
+        self.completion_stream = completion_stream
+
+    def __aiter__(self):
+        return self.completion_stream.__aiter__()
+
+
+def make_player(monkeypatch, stream, supports_stop, supports_stream_options=True, max_tries=10):
+    supported_params = ["stream"]
+    if supports_stop:
+        supported_params.append("stop")
+    if supports_stream_options:
+        supported_params.append("stream_options")
+
+    async def acompletion(**kwargs):
+        assert kwargs["stream"] is True
+        assert ("stop" in kwargs) == supports_stop
+        assert ("stream_options" in kwargs) == supports_stream_options
+        return MockStreamWrapper(stream)
+
+    monkeypatch.setattr(game.litellm, "acompletion", acompletion)
+    monkeypatch.setattr(game.litellm, "get_supported_openai_params", lambda model: supported_params)
+    monkeypatch.setattr(game.litellm, "token_counter", lambda model, text: len(text.split()))
+    return game.AgentPlayer("hosted_vllm/mock", None, stream=True, target_article="C", max_tries=max_tries)
+
+
+GAME_STATE = [{"article": "A", "links": ["B", "C", "D"]}]
+
+
+def test_stream_is_closed_once_answer_tag_closes(monkeypatch):
+    stream = MockAsyncStream(["thinking ", "<answer>", "2</ans", "wer>", " more", " tokens"])
+    player = make_player(monkeypatch, stream, supports_stop=False)
+
+    move, metadata = asyncio.run(player.get_move(GAME_STATE))
+
+    assert move == "C"
+    assert stream.closed
+    # nothing after the closing tag was read
+    assert stream.consumed == 4
+    assert metadata["stream_endings"] == ["cancelled"]
+    assert metadata["completion_tokens"] == 0
+    assert metadata["estimated_completion_tokens"] > 0
+
+
+def test_stop_sequence_uses_server_usage(monkeypatch):
+    stream = MockAsyncStream(["thinking ", "<answer>3"], usage=SimpleNamespace(completion_tokens=42))
+    player = make_player(monkeypatch, stream, supports_stop=True)
+
+    move, metadata = asyncio.run(player.get_move(GAME_STATE))
+
+    assert move == "D"
+    assert stream.closed
+    assert metadata["conversation"][-1]["content"] == "thinking <answer>3</answer>"
+    assert metadata["stream_endings"] == ["stop_sequence"]
+    assert metadata["completion_tokens"] == 42
+    assert metadata["estimated_completion_tokens"] == 0
+
+
+def test_length_cut_is_not_closed_as_stop_sequence(monkeypatch):
+    # "<answer>1" could be the start of "<answer>12" so it must not be taken as link 1
+    stream = MockAsyncStream(["thinking ", "<answer>1"], usage=SimpleNamespace(completion_tokens=7), finish_reason="length")
+    player = make_player(monkeypatch, stream, supports_stop=True, max_tries=1)
+
+    move, metadata = asyncio.run(player.get_move(GAME_STATE))
+
+    assert move == -1
+    assert metadata["conversation"][1]["content"] == "thinking <answer>1"
+    assert metadata["stream_endings"] == ["finished"]
+
+
+def test_natural_finish_is_not_an_early_stop(monkeypatch):
+    stream = MockAsyncStream(["I pick ", "<answer>1"], usage=SimpleNamespace(completion_tokens=5))
+    player = make_player(monkeypatch, stream, supports_stop=False, max_tries=1)
+
+    move, metadata = asyncio.run(player.get_move(GAME_STATE))
+
+    # without a stop sequence an unclosed tag is just a malformed answer
+    assert move == -1
+    assert metadata["stream_endings"] == ["finished"]
+    # the server reported usage for a stream that finished on its own
+    assert metadata["completion_tokens"] == 5
+    assert metadata["estimated_completion_tokens"] == 0
+
+
+def test_usage_is_estimated_without_stream_options(monkeypatch):
+    stream = MockAsyncStream(["thinking ", "<answer>3"])
+    player = make_player(monkeypatch, stream, supports_stop=True, supports_stream_options=False)
+
+    move, metadata = asyncio.run(player.get_move(GAME_STATE))
+
+    assert move == "D"
+    assert metadata["completion_tokens"] == 0
+    assert metadata["estimated_completion_tokens"] > 0
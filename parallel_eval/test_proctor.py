@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import sqlite3
+
+import pytest
+
+pytest.importorskip("litellm")
+
+import game
+import proctor
+
+AGENT_SETTINGS = {"model": "mock", "api_base": None, "max_links": 200, "max_tries": 1}
+LINKS = {"A": ["B"], "B": ["C"], "C": ["D"], "D": ["A"]}
+
+
+class Crash(Exception):
+    pass
+
+
+@pytest.fixture
+def db(tmp_path):
+    db_path = tmp_path / "wikihop.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE core_articles (title TEXT PRIMARY KEY, links_json TEXT)")
+    conn.executemany("INSERT INTO core_articles VALUES (?, ?)", ((t, json.dumps(l)) for t, l in LINKS.items()))
+    conn.commit()
+    conn.close()
+    return game.SQLiteDB(str(db_path))
+
+
+@pytest.fixture
+def moves(monkeypatch):
+    """Replaces the agent with one that always takes the first link, crashing on the move listed in crash_on"""
+    record = {"articles": [], "crash_on": None}
+
+    async def get_move(self, game_state):
+        record["articles"].append(game_state[-1]["article"])
+        if len(record["articles"]) == record["crash_on"]:
+            raise Crash
+        return game_state[-1]["links"][0], {"tries": 0}
+
+    monkeypatch.setattr(game.AgentPlayer, "get_move", get_move)
+    return record
+
+
+def make_run(db, tmp_path):
+    return proctor.Run("A", "D", 10, AGENT_SETTINGS, db, str(tmp_path), False, "test", 42)
+
+
+def read_checkpoint(run):
+    with open(run.checkpoint_file, "r") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_crashed_run_resumes_from_last_completed_step(db, tmp_path, moves):
+    run = make_run(db, tmp_path)
+    moves["crash_on"] = 2
+    with pytest.raises(Crash):
+        asyncio.run(run.run())
+
+    # the start step and the move to B were saved before the crash
+    assert [step["article"] for step in read_checkpoint(run)] == ["A", "B"]
+    assert not os.path.exists(run.output_file)
+
+    moves["crash_on"] = None
+    asyncio.run(run.run())
+
+    # the crashed move from B is retried, the move from A is not
+    assert moves["articles"] == ["A", "B", "B", "C"]
+    with open(run.output_file, "r") as f:
+        output = json.load(f)
+    assert [step["article"] for step in output["steps"]] == ["A", "B", "C", "D"]
+    assert output["result"] == "win"
+    assert not os.path.exists(run.checkpoint_file)
+
+
+def test_truncated_trailing_line_is_dropped(db, tmp_path, moves):
+    run = make_run(db, tmp_path)
+    moves["crash_on"] = 2
+    with pytest.raises(Crash):
+        asyncio.run(run.run())
+    with open(run.checkpoint_file, "a") as f:
+        f.write('{"type": "move", "arti')
+
+    assert [step["article"] for step in run.load_checkpoint()] == ["A", "B"]
+    # the partial line is gone from disk, so the next append starts on a fresh line
+    assert [step["article"] for step in read_checkpoint(run)] == ["A", "B"]
+    assert not os.path.exists(run.checkpoint_file + ".tmp")
+
+
+def test_missing_trailing_newline_is_repaired(db, tmp_path, moves):
+    run = make_run(db, tmp_path)
+    with open(run.checkpoint_file, "w") as f:
+        f.write(json.dumps({"type": "start", "article": "A", "links": ["B"], "metadata": {}}))
+
+    moves["crash_on"] = None
+    asyncio.run(run.run())
+
+    with open(run.output_file, "r") as f:
+        assert [step["article"] for step in json.load(f)["steps"]] == ["A", "B", "C", "D"]
+
+
+@pytest.mark.parametrize("result", ["win", "lose"])
+def test_finished_checkpoint_does_not_call_player(db, tmp_path, moves, result):
+    run = make_run(db, tmp_path)
+    steps = [
+        {"type": "start", "article": "A", "links": ["B"], "metadata": {}},
+        {"type": result, "article": "B", "metadata": {}},
+    ]
+    with open(run.checkpoint_file, "w") as f:
+        f.writelines(json.dumps(step) + "\n" for step in steps)
+
+    asyncio.run(run.run())
+
+    assert moves["articles"] == []
+    with open(run.output_file, "r") as f:
+        assert json.load(f)["result"] == result
+    assert not os.path.exists(run.checkpoint_file)
+
+
+def test_run_without_checkpoint_does_not_create_one_before_starting(db, tmp_path):
+    run = make_run(db, tmp_path)
+
+    assert run.load_checkpoint() == []
+    assert not os.path.exists(run.checkpoint_file)
@@ -0,0 +1,83 @@
+import importlib
+import json
+import os
+import sqlite3
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    # api.py serves ./dist as static files when it is imported
+    os.makedirs(tmp_path / "dist")
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("api")
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    db_path = str(tmp_path / "wikihop.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE core_articles (title TEXT PRIMARY KEY, links_json TEXT)")
+    conn.executemany("INSERT INTO core_articles VALUES (?, ?)", ((f"Article {i}", "[]") for i in range(3)))
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def write_manifest(db_path, **overrides):
+    manifest = {
+        "db_size": os.path.getsize(db_path),
+        "db_mtime": os.path.getmtime(db_path),
+        # deliberately different from the real count so we can tell which one was used
+        "article_count": 100,
+    }
+    manifest.update(overrides)
+    with open(db_path + ".manifest.json", "w") as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def test_count_is_read_from_manifest(api, db_path):
+    write_manifest(db_path)
+
+    assert api.SQLiteDB(db_path).article_count == 100
+
+
+def test_missing_manifest_falls_back_to_count(api, db_path):
+    assert api.SQLiteDB(db_path).article_count == 3
+
+
+@pytest.mark.parametrize("field", ["db_size", "db_mtime"])
+def test_stale_manifest_falls_back_to_count(api, db_path, field):
+    manifest = write_manifest(db_path)
+    write_manifest(db_path, **{field: manifest[field] + 1})
+
+    assert api.SQLiteDB(db_path).article_count == 3
+
+
+@pytest.mark.parametrize("field", ["db_size", "db_mtime", "article_count"])
+def test_manifest_missing_key_falls_back_to_count(api, db_path, field):
+    manifest = write_manifest(db_path)
+    del manifest[field]
+    with open(db_path + ".manifest.json", "w") as f:
+        json.dump(manifest, f)
+
+    assert api.SQLiteDB(db_path).article_count == 3
+
+
+def test_malformed_manifest_falls_back_to_count(api, db_path):
+    with open(db_path + ".manifest.json", "w") as f:
+        f.write('{"article_count": ')
+
+    assert api.SQLiteDB(db_path).article_count == 3
+
+
+def test_build_manifest_matches_db(api, db_path):
+    from build_manifest import build_manifest
+
+    build_manifest(db_path)
+
+    assert api.SQLiteDB(db_path).article_count == 3